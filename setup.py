@@ -11,26 +11,28 @@ setup(
     author_email="your.email@example.com",
     packages=find_packages(),
     install_requires=[
-        "librosa>=0.10.0",
         "soundfile>=0.12.1",
-        "noisereduce>=2.0.0",
+        "numba>=0.56.0",
         "numpy>=1.21.0",
         "scipy>=1.7.0",
         "PyQt5>=5.15.0",
-        "pydub>=0.25.1",
     ],
+    extras_require={
+        # Faster in-process MP3 encoding (falls back to ffmpeg otherwise)
+        "mp3": ["lameenc>=1.4.0"],
+        # GPU noise reduction when a CUDA device is available
+        "gpu": ["torch>=1.13.0"],
+    },
     entry_points={
         "console_scripts": [
             "lecture-audio-cleaner=src.main:main",
         ],
     },
-    python_requires=">=3.8",
+    python_requires=">=3.10",
     classifiers=[
         "Development Status :: 3 - Alpha",
         "Intended Audience :: Education",
         "License :: OSI Approved :: MIT License",
-        "Programming Language :: Python :: 3.8",
-        "Programming Language :: Python :: 3.9",
         "Programming Language :: Python :: 3.10",
     ],
 ) 
\ No newline at end of file
@@ -1,28 +1,72 @@
 """
 Audio processing module.
+
+soundfile and the spectral gate (numba/scipy) are imported on first use so
+that importing this module, and the GUI that depends on it, stays fast.
 """
-import librosa
-import soundfile as sf
-import noisereduce as nr
 import numpy as np
+import hashlib
+import os
+import struct
+import subprocess
+import tempfile
 import traceback
 import logging
-from typing import List, Callable, Optional
-from pydub import AudioSegment
-import io
+import zipfile
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Tuple
 from .task import AudioTask, NoiseReductionLevel
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# Noise reduction runs over windows of this length, cross-faded over the overlap
+NOISE_REDUCTION_CHUNK_SECONDS = 30
+NOISE_REDUCTION_OVERLAP_SECONDS = 1
+
+# Noise profiles are cached here so re-running a file skips the estimate. Only
+# the most recently used NOISE_PROFILE_CACHE_MAX_ENTRIES profiles are kept.
+NOISE_PROFILE_CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "lecture-audio-cleaner"
+)
+NOISE_PROFILE_CACHE_MAX_ENTRIES = 256
+
+# Samples converted to 16-bit PCM at a time when encoding MP3
+PCM_BLOCK_SAMPLES = 1 << 16
+
+def _prune_noise_profile_cache() -> None:
+    """Delete the least recently used noise profiles beyond the cache limit."""
+    entries = []
+    for entry in NOISE_PROFILE_CACHE_DIR.glob("*.npz"):
+        try:
+            entries.append((entry.stat().st_mtime, entry))
+        except FileNotFoundError:
+            # Pruned concurrently by another task
+            continue
+    entries.sort(reverse=True)
+    for _, entry in entries[NOISE_PROFILE_CACHE_MAX_ENTRIES:]:
+        entry.unlink(missing_ok=True)
+
+def _int16_blocks(y: np.ndarray) -> Iterator[np.ndarray]:
+    """Convert a float signal in [-1, 1] to clipped 16-bit PCM, block by block.
+    
+    Blocks are converted in reused buffers so a memory-mapped signal is never
+    loaded whole. Each yielded block is only valid until the next one.
+    """
+    scaled = np.empty(PCM_BLOCK_SAMPLES, dtype=np.float32)
+    pcm = np.empty(PCM_BLOCK_SAMPLES, dtype=np.int16)
+    for start in range(0, len(y), PCM_BLOCK_SAMPLES):
+        block = y[start:start + PCM_BLOCK_SAMPLES]
+        n = len(block)
+        np.multiply(block, 32767, out=scaled[:n])
+        np.clip(scaled[:n], -32768, 32767, out=scaled[:n])
+        np.copyto(pcm[:n], scaled[:n], casting='unsafe')
+        yield pcm[:n]
+
 class AudioProcessor:
     """Handles audio processing operations."""
     
-    def __init__(self):
-        """Initialize the audio processor."""
-        self.is_processing = False
-        
     def process_audio(self, task: AudioTask, progress_callback: Optional[Callable[[int], None]] = None) -> bool:
         """Process a single audio task with progress updates.
         
@@ -33,6 +77,7 @@ class AudioProcessor:
         Returns:
             bool: True if processing was successful, False otherwise
         """
+        scratch_path = None
         try:
             logger.info(f"Starting to process task: {task.name}")
             logger.info(f"Input path: {task.input_path}")
@@ -46,7 +91,7 @@ class AudioProcessor:
                 progress_callback(10)
             logger.debug("Loading audio file...")
             try:
-                y, sr = librosa.load(task.input_path, sr=None)
+                y, sr = self._load_audio(task.input_path)
                 logger.debug(f"Audio loaded successfully. Shape: {y.shape}, Sample rate: {sr}")
             except Exception as e:
                 logger.error(f"Failed to load audio file: {str(e)}")
@@ -58,7 +103,15 @@ class AudioProcessor:
                 progress_callback(30)
             logger.debug("Applying noise reduction...")
             try:
-                y_clean = self._apply_noise_reduction(y, sr, task.noise_reduction_level)
+                # Back the cleaned signal with a scratch file so the OS can page it
+                # out instead of holding a second full copy of the signal in RAM
+                fd, scratch_path = tempfile.mkstemp(prefix='lac_', suffix='.f32')
+                os.close(fd)
+                y_clean = np.memmap(scratch_path, dtype=np.float32, mode='w+', shape=y.shape)
+                y_clean = self._apply_noise_reduction(
+                    y, sr, task.noise_reduction_level, progress_callback,
+                    input_path=task.input_path, out=y_clean
+                )
                 logger.debug(f"Noise reduction completed. Output shape: {y_clean.shape}")
             except Exception as e:
                 logger.error(f"Failed to apply noise reduction: {str(e)}")
@@ -84,19 +137,15 @@ class AudioProcessor:
             logger.debug(f"Saving processed audio to {task.output_path}")
             try:
                 if task.output_format.lower() == 'mp3':
-                    # For MP3 output, we need to:
-                    # 1. Save as WAV to a buffer
-                    # 2. Convert to MP3 using pydub
-                    wav_buffer = io.BytesIO()
-                    sf.write(wav_buffer, y_clean, sr, format='WAV')
-                    wav_buffer.seek(0)
-                    
-                    # Convert to MP3
-                    audio_segment = AudioSegment.from_wav(wav_buffer)
-                    audio_segment.export(task.output_path, format='mp3')
+                    # Encode straight from the sample buffer
+                    self._export_mp3(y_clean, sr, task.output_path)
                 else:
-                    # Direct WAV output
-                    sf.write(task.output_path, y_clean, sr)
+                    # Direct output through libsndfile, as 16-bit PCM where the
+                    # container supports it (ogg is always Vorbis-encoded)
+                    import soundfile as sf
+                    y_clean = y_clean.astype(np.float32, copy=False)
+                    subtype = 'PCM_16' if task.output_format.lower() in ('wav', 'flac') else None
+                    sf.write(task.output_path, y_clean, sr, subtype=subtype)
                 logger.debug("Audio saved successfully")
             except Exception as e:
                 logger.error(f"Failed to save audio file: {str(e)}")
@@ -112,40 +161,181 @@ class AudioProcessor:
             logger.error(f"Error processing task {task.name}: {str(e)}")
             logger.error(traceback.format_exc())
             return False
+        finally:
+            if scratch_path is not None:
+                # Drop the mapping before removing its file (required on Windows)
+                y_clean = None
+                try:
+                    os.unlink(scratch_path)
+                except OSError as e:
+                    logger.warning(f"Could not remove scratch file {scratch_path}: {str(e)}")
         
-    def process_tasks(self, tasks: List[AudioTask]) -> None:
-        """Process a list of audio tasks."""
-        self.is_processing = True
-        for task in tasks:
-            if not self.is_processing:
-                break
-            self._process_task(task)
-            
-    def stop_processing(self) -> None:
-        """Stop the current processing operation."""
-        self.is_processing = False
+    def _load_audio(self, path: str) -> Tuple[np.ndarray, int]:
+        """Decode an audio file into a mono float32 signal.
+        
+        Formats supported by libsndfile are read directly with soundfile.
+        Anything else (e.g. m4a/aac) is decoded through an ffmpeg pipe at
+        its native sample rate.
+        """
+        import soundfile as sf
         
-    def _process_task(self, task: AudioTask) -> None:
-        """Process a single audio task."""
         try:
-            # Load audio file
-            y, sr = librosa.load(task.input_path, sr=None)
+            y, sr = sf.read(path, dtype='float32', always_2d=False)
+        except RuntimeError as e:
+            logger.debug(f"soundfile could not read {path} ({str(e)}), falling back to ffmpeg")
+            return self._load_audio_ffmpeg(path)
+        
+        # Mono files come back 1-D and are used as read; only multi-channel
+        # audio is downmixed, accumulating in float32
+        if y.ndim == 2:
+            y = y.mean(axis=1, dtype=np.float32)
+        return y, sr
+        
+    def _load_audio_ffmpeg(self, path: str) -> Tuple[np.ndarray, int]:
+        """Decode an audio file to mono float32 samples using ffmpeg.
+        
+        ffmpeg writes a float WAV stream to the pipe so the native sample
+        rate can be read from its fmt chunk. Chunk sizes in a piped header
+        are placeholders, so the data chunk runs to the end of the stream.
+        """
+        cmd = [
+            'ffmpeg', '-v', 'quiet', '-i', path,
+            '-f', 'wav', '-acodec', 'pcm_f32le', '-ac', '1', 'pipe:1'
+        ]
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            bufsize=1 << 20
+        )
+        buf, _ = proc.communicate()
+        if proc.returncode != 0:
+            raise subprocess.CalledProcessError(proc.returncode, cmd)
+        if buf[:4] != b'RIFF' or buf[8:12] != b'WAVE':
+            raise ValueError(f"ffmpeg did not produce a WAV stream for {path}")
+        
+        sr = None
+        offset = 12
+        while offset + 8 <= len(buf):
+            chunk_id, size = struct.unpack_from('<4sI', buf, offset)
+            offset += 8
+            if chunk_id == b'fmt ':
+                sr = struct.unpack_from('<I', buf, offset + 4)[0]
+            elif chunk_id == b'data' and sr is not None:
+                count = (len(buf) - offset) // 4
+                return np.frombuffer(buf, dtype=np.float32, count=count, offset=offset), sr
+            offset += size + (size & 1)
+        raise ValueError(f"No audio data in ffmpeg output for {path}")
+        
+    def _export_mp3(self, y: np.ndarray, sr: int, path: str) -> None:
+        """Encode a mono signal to MP3.
+        
+        Uses lameenc when it is installed, otherwise pipes raw 16-bit PCM
+        into ffmpeg's libmp3lame encoder. The signal is converted and fed to
+        the encoder in blocks of PCM_BLOCK_SAMPLES.
+        """
+        try:
+            import lameenc
+        except ImportError:
+            lameenc = None
             
-            # Apply noise reduction
-            y_clean = self._apply_noise_reduction(y, sr, task.noise_reduction_level)
+        if lameenc is not None:
+            encoder = lameenc.Encoder()
+            encoder.set_bit_rate(128)
+            encoder.set_in_sample_rate(sr)
+            encoder.set_channels(1)
+            with open(path, 'wb') as f:
+                for block in _int16_blocks(y):
+                    f.write(encoder.encode(block.tobytes()))
+                f.write(encoder.flush())
+            return
             
-            # Apply speech enhancement if enabled
-            if task.enable_speech_enhancement:
-                y_clean = self._enhance_speech(y_clean, sr)
-                
-            # Save processed audio
-            sf.write(task.output_path, y_clean, sr)
+        logger.debug("lameenc not available, encoding MP3 with ffmpeg")
+        cmd = [
+            'ffmpeg', '-y', '-v', 'quiet',
+            '-f', 's16le', '-ar', str(sr), '-ac', '1', '-i', 'pipe:0',
+            '-codec:a', 'libmp3lame', '-q:a', '4', path
+        ]
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, bufsize=1 << 20)
+        try:
+            for block in _int16_blocks(y):
+                proc.stdin.write(memoryview(block))
+        except BrokenPipeError:
+            # ffmpeg exited early; its return code is checked below
+            pass
+        finally:
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+        if proc.wait() != 0:
+            raise subprocess.CalledProcessError(proc.returncode, cmd)
             
-        except Exception as e:
-            print(f"Error processing {task.name}: {str(e)}")
+    def _noise_profile(self, path: Optional[str], y: np.ndarray, sr: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the noise profile (per-bin dB mean and std) for a signal.
+        
+        The profile is estimated from the first second of audio. When the
+        source path is known it is cached in NOISE_PROFILE_CACHE_DIR, keyed by
+        path, mtime and sample rate, so re-processing the same file reuses it.
+        """
+        from .spectral import noise_profile, stft_params
+        
+        n_fft, hop_length = stft_params(sr)
+        if path is None:
+            return noise_profile(y[:sr], sr, n_fft, hop_length)
             
-    def _apply_noise_reduction(self, y: np.ndarray, sr: int, level: NoiseReductionLevel) -> np.ndarray:
-        """Apply noise reduction to audio signal."""
+        cache_file = None
+        try:
+            key = hashlib.sha1(
+                f"{os.path.abspath(path)}|{os.path.getmtime(path)}|{sr}|{n_fft}|{hop_length}".encode()
+            ).hexdigest()
+            cache_file = NOISE_PROFILE_CACHE_DIR / f"{key}.npz"
+            with np.load(cache_file) as cached:
+                noise_mean, noise_std = cached["mean"], cached["std"]
+        except FileNotFoundError:
+            # Not cached yet
+            pass
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+            # Unreadable or corrupt entries are recomputed and overwritten
+            logger.warning(f"Could not read cached noise profile: {str(e)}")
+        else:
+            logger.debug(f"Using cached noise profile {cache_file}")
+            # Mark the entry as recently used so pruning keeps it
+            try:
+                os.utime(cache_file)
+            except OSError:
+                pass
+            return noise_mean, noise_std
+            
+        noise_mean, noise_std = noise_profile(y[:sr], sr, n_fft, hop_length)
+        
+        if cache_file is not None:
+            try:
+                NOISE_PROFILE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                # Write to a private file first so concurrent tasks never see a partial profile
+                fd, tmp_file = tempfile.mkstemp(prefix=f"{key}.", suffix=".tmp", dir=NOISE_PROFILE_CACHE_DIR)
+                with os.fdopen(fd, "wb") as f:
+                    np.savez(f, mean=noise_mean, std=noise_std)
+                os.replace(tmp_file, cache_file)
+                _prune_noise_profile_cache()
+            except OSError as e:
+                logger.warning(f"Could not cache noise profile: {str(e)}")
+                
+        return noise_mean, noise_std
+        
+    def _apply_noise_reduction(self, y: np.ndarray, sr: int, level: NoiseReductionLevel,
+                               progress_callback: Optional[Callable[[int], None]] = None,
+                               input_path: Optional[str] = None,
+                               out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Apply noise reduction to audio signal.
+        
+        The signal is processed in overlapping windows so that only one
+        window's STFT is held in memory at a time. Progress is reported in
+        the 30-60 range while the windows are processed. The result is
+        written to out when given (a float32 array shaped like y).
+        """
+        from .spectral import spectral_gate, spectral_gate_torch, cuda_available, stft_params
+        
         try:
             # Convert noise reduction level to reduction strength
             reduction_strength = {
@@ -154,20 +344,57 @@ class AudioProcessor:
                 NoiseReductionLevel.STRONG: 0.9
             }[level]
             
+            # Keep the signal contiguous float32 so no float64 intermediates are created
+            y = np.ascontiguousarray(y, dtype=np.float32)
+            
             # Estimate noise from the first second of audio
-            noise_clip = y[:sr]
-            logger.debug(f"Using noise profile of length: {len(noise_clip)}")
+            logger.debug(f"Using noise profile of length: {min(len(y), sr)}")
             logger.debug(f"Input signal shape: {y.shape}, Sample rate: {sr}")
+            noise_mean, noise_std = self._noise_profile(input_path, y, sr)
+            n_fft, hop_length = stft_params(sr)
             
-            # Apply noise reduction using noisereduce's current API
-            return nr.reduce_noise(
-                y=y,
-                sr=sr,
-                y_noise=noise_clip,
-                prop_decrease=reduction_strength,
-                stationary=True,
-                n_std_thresh_stationary=1.5
-            )
+            chunk = NOISE_REDUCTION_CHUNK_SECONDS * sr
+            overlap = NOISE_REDUCTION_OVERLAP_SECONDS * sr
+            fade_in = np.linspace(0.0, 1.0, overlap, dtype=np.float32)
+            y_clean = np.empty_like(y) if out is None else out
+            
+            # Run the gate on the GPU when torch with CUDA is installed
+            if cuda_available():
+                logger.debug("Running noise reduction on CUDA")
+                gate = spectral_gate_torch
+            else:
+                gate = spectral_gate
+            
+            for start in range(0, len(y), chunk - overlap):
+                if progress_callback:
+                    progress_callback(30 + int(30 * start / len(y)))
+                
+                # Gate the window against the stationary noise profile
+                reduced = gate(
+                    y[start:start + chunk],
+                    sr,
+                    noise_mean,
+                    noise_std,
+                    prop_decrease=reduction_strength,
+                    n_std_thresh=1.5,
+                    n_fft=n_fft,
+                    hop_length=hop_length
+                )
+                
+                # Cross-fade into the tail of the previous window
+                end = start + len(reduced)
+                if start == 0:
+                    y_clean[:end] = reduced
+                else:
+                    n = min(overlap, len(reduced))
+                    y_clean[start:start + n] *= 1.0 - fade_in[:n]
+                    y_clean[start:start + n] += reduced[:n] * fade_in[:n]
+                    y_clean[start + n:end] = reduced[n:]
+                
+                if end >= len(y):
+                    break
+                    
+            return y_clean
                 
         except Exception as e:
             logger.error(f"Error in noise reduction: {str(e)}")
@@ -183,4 +410,4 @@ class AudioProcessor:
         except Exception as e:
             logger.error(f"Error in speech enhancement: {str(e)}")
             logger.error(traceback.format_exc())
-            raise 
\ No newline at end of file
+            raise
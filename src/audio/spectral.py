@@ -0,0 +1,178 @@
+"""
+Spectral gating noise reduction.
+"""
+import functools
+import numpy as np
+from numba import njit
+from scipy.signal import stft, istft, fftconvolve
+from typing import Tuple
+
+# Default STFT parameters (see stft_params for the per-rate choice)
+N_FFT = 1024
+HOP_LENGTH = 256
+
+# Extent of the gain mask smoothing, matching noisereduce's defaults
+FREQ_SMOOTH_HZ = 500
+TIME_SMOOTH_MS = 50
+
+# Compiled serially: tasks call the gate from several threads at once, and
+# numba's default parallel (workqueue) layer aborts on concurrent use. Not
+# cached on disk: the cache records the importing module's name, and the app
+# (audio.spectral) and the tests (src.audio.spectral) use different ones.
+@njit(fastmath=True)
+def _stationary_gate(mag_db, noise_mean, noise_std, n_std, prop):
+    """Compute per-bin gains, attenuating bins below the noise threshold."""
+    gain = np.empty_like(mag_db)
+    # Rows are frequency bins, so the inner loop walks contiguous memory
+    for f in range(mag_db.shape[0]):
+        thr = noise_mean[f] + n_std * noise_std[f]
+        for t in range(mag_db.shape[1]):
+            gain[f, t] = 1.0 - prop if mag_db[f, t] < thr else 1.0
+    return gain
+
+def _to_db(mag: np.ndarray) -> np.ndarray:
+    """Convert a magnitude spectrogram to decibels."""
+    return 20 * np.log10(np.maximum(mag, np.float32(1e-10)))
+
+def _stft(y: np.ndarray, sr: int, n_fft: int, hop_length: int) -> np.ndarray:
+    """Compute the complex64 STFT of a float32 signal."""
+    y = np.ascontiguousarray(y, dtype=np.float32)
+    # Signals shorter than one frame are zero-padded to a full frame
+    if len(y) < n_fft:
+        y = np.pad(y, (0, n_fft - len(y)))
+    _, _, spec = stft(
+        y,
+        fs=sr,
+        nperseg=n_fft,
+        noverlap=n_fft - hop_length
+    )
+    return spec
+
+def _smoothing_filter(sr: int, n_fft: int, hop_length: int) -> np.ndarray:
+    """Build the triangular 2D filter used to smooth the gain mask."""
+    n_freq = max(1, int(FREQ_SMOOTH_HZ / (sr / n_fft)))
+    n_time = max(1, int(TIME_SMOOTH_MS / (hop_length / sr * 1000)))
+    kernel = np.outer(
+        np.bartlett(2 * n_freq + 3)[1:-1],
+        np.bartlett(2 * n_time + 3)[1:-1]
+    ).astype(np.float32)
+    return kernel / kernel.sum()
+
+def _time_filter(kernel: np.ndarray) -> np.ndarray:
+    """Take the time-only (single frequency row) part of a smoothing filter."""
+    row = kernel[kernel.shape[0] // 2][None, :]
+    return row / row.sum()
+
+def _smooth(gain: np.ndarray, kernel: np.ndarray) -> np.ndarray:
+    """Smooth the gain mask, extending its edges instead of zero-padding."""
+    pad_f, pad_t = kernel.shape[0] // 2, kernel.shape[1] // 2
+    padded = np.pad(gain, ((pad_f, pad_f), (pad_t, pad_t)), mode='edge')
+    return fftconvolve(padded, kernel, mode='valid')
+
+def _smooth_mask(gain: np.ndarray, sr: int, n_fft: int, hop_length: int) -> np.ndarray:
+    """Smooth the gain mask without eroding narrow-band signal.
+
+    Smoothing across frequency pulls a narrow peak that stays above the
+    threshold (a tone, a speech harmonic) down towards the attenuated bins
+    around it. Taking the larger of that and the time-only smoothed mask
+    keeps such peaks, while isolated noise bins are still smoothed away.
+    """
+    kernel = _smoothing_filter(sr, n_fft, hop_length)
+    return np.maximum(_smooth(gain, kernel), _smooth(gain, _time_filter(kernel)))
+
+def stft_params(sr: int) -> Tuple[int, int]:
+    """Pick the FFT size and hop length for a sample rate.
+
+    Both sizes are powers of two, which the FFT backends handle fastest, and
+    give frames of roughly 23 ms at 22.05 kHz and 44.1 kHz alike.
+    """
+    n_fft = 512 if sr <= 22050 else 1024
+    return n_fft, n_fft // 4
+
+def noise_profile(noise_clip: np.ndarray, sr: int, n_fft: int = N_FFT,
+                  hop_length: int = HOP_LENGTH) -> Tuple[np.ndarray, np.ndarray]:
+    """Estimate the per-bin mean and standard deviation (dB) of a noise clip."""
+    noise_db = _to_db(np.abs(_stft(noise_clip, sr, n_fft, hop_length)))
+    return noise_db.mean(axis=1), noise_db.std(axis=1)
+
+def spectral_gate(y: np.ndarray, sr: int, noise_mean: np.ndarray, noise_std: np.ndarray,
+                  prop_decrease: float, n_std_thresh: float = 1.5, n_fft: int = N_FFT,
+                  hop_length: int = HOP_LENGTH) -> np.ndarray:
+    """Apply stationary spectral gating to a signal.
+
+    Bins whose level falls below the noise mean plus n_std_thresh standard
+    deviations are attenuated by prop_decrease.
+
+    Returns:
+        np.ndarray: The gated float32 signal, same length as y
+    """
+    spec = _stft(y, sr, n_fft, hop_length)
+    gain = _stationary_gate(
+        _to_db(np.abs(spec)),
+        noise_mean.astype(np.float32, copy=False),
+        noise_std.astype(np.float32, copy=False),
+        n_std_thresh,
+        prop_decrease
+    )
+    spec *= _smooth_mask(gain, sr, n_fft, hop_length)
+
+    _, y_out = istft(spec, fs=sr, nperseg=n_fft, noverlap=n_fft - hop_length)
+    return y_out[:len(y)].astype(np.float32, copy=False)
+
+@functools.lru_cache(maxsize=None)
+def cuda_available() -> bool:
+    """Check whether the optional torch dependency can run on a CUDA device."""
+    try:
+        import torch
+    except ImportError:
+        return False
+    return torch.cuda.is_available()
+
+def spectral_gate_torch(y: np.ndarray, sr: int, noise_mean: np.ndarray, noise_std: np.ndarray,
+                        prop_decrease: float, n_std_thresh: float = 1.5, n_fft: int = N_FFT,
+                        hop_length: int = HOP_LENGTH) -> np.ndarray:
+    """Apply stationary spectral gating on the GPU.
+
+    Same as spectral_gate, but the STFT, gain mask and smoothing run on a
+    CUDA device with torch. Only call this when cuda_available() is True.
+
+    Returns:
+        np.ndarray: The gated float32 signal, same length as y
+    """
+    import torch
+    import torch.nn.functional as F
+
+    device = torch.device("cuda")
+    window = torch.hann_window(n_fft, device=device)
+    y_gpu = torch.from_numpy(np.ascontiguousarray(y, dtype=np.float32)).to(device)
+    if len(y) < n_fft:
+        y_gpu = F.pad(y_gpu, (0, n_fft - len(y)))
+
+    # Zero-padded centering and window-sum scaling match scipy's stft, so
+    # noise profiles from noise_profile() apply unchanged
+    spec = torch.stft(
+        y_gpu, n_fft, hop_length,
+        window=window, center=True, pad_mode="constant", return_complex=True
+    ) / window.sum()
+    mag_db = 20 * torch.log10(spec.abs().clamp_min(1e-10))
+
+    threshold = torch.from_numpy(
+        (noise_mean + n_std_thresh * noise_std).astype(np.float32)
+    ).to(device)[:, None]
+    gain = 1.0 - prop_decrease * (mag_db < threshold).float()
+
+    def smooth(kernel):
+        kernel = torch.from_numpy(kernel).to(device)
+        pad_f, pad_t = kernel.shape[0] // 2, kernel.shape[1] // 2
+        padded = F.pad(gain[None, None], (pad_t, pad_t, pad_f, pad_f), mode="replicate")
+        return F.conv2d(padded, kernel[None, None])[0, 0]
+
+    # Same mask smoothing as _smooth_mask
+    kernel = _smoothing_filter(sr, n_fft, hop_length)
+    gain = torch.maximum(smooth(kernel), smooth(_time_filter(kernel)))
+
+    y_out = torch.istft(
+        spec * gain * window.sum(), n_fft, hop_length,
+        window=window, center=True, length=y_gpu.shape[0]
+    )
+    return y_out[:len(y)].cpu().numpy()
@@ -23,7 +23,17 @@ class BackgroundNoiseLevel(Enum):
     MODERATE = "moderate"  # Balance between noise reduction and natural sound
     AGGRESSIVE = "aggressive"  # Maximum noise reduction
 
-@dataclass
+# Map of input extensions to output formats
+_FORMAT_MAP = {
+    '.wav': 'wav',
+    '.mp3': 'mp3',
+    '.m4a': 'm4a',
+    '.aac': 'aac',
+    '.ogg': 'ogg',
+    '.flac': 'flac'
+}
+
+@dataclass(slots=True)
 class AudioTask:
     """Represents an audio processing task."""
     input_path: str
@@ -33,37 +43,20 @@ class AudioTask:
     speech_enhancement_level: SpeechEnhancementLevel = SpeechEnhancementLevel.MEDIUM
     voice_clarity_boost: bool = True
     background_noise_level: BackgroundNoiseLevel = BackgroundNoiseLevel.MODERATE
+    output_format: str = ""  # Derived from the input extension when empty
+    output_path: str = ""  # Derived from the input path when empty
     
     def __post_init__(self):
-        """Initialize task name from input path if not provided."""
+        """Initialize task name and output settings from input path if not provided."""
+        input_path = Path(self.input_path)
         if not self.name:
-            self.name = Path(self.input_path).stem
+            self.name = input_path.stem
             
-    @property
-    def output_path(self) -> str:
-        """Generate output path based on input path."""
-        input_path = Path(self.input_path)
-        return str(input_path.parent / f"{input_path.stem}_cleaned{input_path.suffix}")
-        
-    @property
-    def output_format(self) -> str:
-        """Get the output format based on input file extension."""
-        input_path = Path(self.input_path)
-        ext = input_path.suffix.lower()
-        
-        # Map of input extensions to output formats
-        format_map = {
-            '.wav': 'wav',
-            '.mp3': 'mp3',
-            '.m4a': 'm4a',
-            '.aac': 'aac',
-            '.ogg': 'ogg',
-            '.flac': 'flac'
-        }
-        
-        # If input format is supported, use the same format
-        if ext in format_map:
-            return format_map[ext]
+        # If input format is supported, use the same format; otherwise use WAV (lossless)
+        input_format = _FORMAT_MAP.get(input_path.suffix.lower())
+        if not self.output_format:
+            self.output_format = input_format or 'wav'
             
-        # For unsupported formats, use WAV as default (lossless)
-        return 'wav' 
\ No newline at end of file
+        if not self.output_path:
+            suffix = input_path.suffix if input_format == self.output_format else f".{self.output_format}"
+            self.output_path = str(input_path.parent / f"{input_path.stem}_cleaned{suffix}")
@@ -6,61 +6,88 @@ from PyQt5.QtWidgets import (
     QPushButton, QListWidget, QProgressBar, QFileDialog,
     QMessageBox, QLabel, QComboBox, QDialog, QScrollArea
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
-from audio.processor import AudioProcessor
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
+from typing import Optional
+import os
 from audio.task import AudioTask
 from .task_dialog import TaskDialog
 from .task_item import TaskItem
 
-class ProcessingThread(QThread):
-    """Thread for processing audio tasks."""
+class ProcessingSignals(QObject):
+    """Signals for a ProcessingRunnable (QRunnable is not a QObject)."""
     progress_updated = pyqtSignal(str, int)  # task_name, progress
     task_completed = pyqtSignal(str, bool, str)  # task_name, success, message
+    finished = pyqtSignal(str)  # task_name, emitted once run() returns, even when cancelled
+
+class ProcessingRunnable(QRunnable):
+    """Runnable that processes an audio task on the thread pool."""
     
     def __init__(self, processor, task):
         super().__init__()
         self.processor = processor
         self.task = task
-        self.is_running = False
+        self.signals = ProcessingSignals()
+        self.cancelled = False
+        self._last_progress = -1
         
     def run(self):
         """Run the processing task."""
-        self.is_running = True
+        try:
+            self._process()
+        finally:
+            self.signals.finished.emit(self.task.name)
+            
+    def _process(self):
+        """Process the task, reporting the result unless cancelled."""
+        # Cancelled before the pool got to it
+        if self.cancelled:
+            return
         try:
             # Process the audio file
             success = self.processor.process_audio(
                 self.task,
-                progress_callback=lambda p: self.progress_updated.emit(self.task.name, p)
+                progress_callback=self._emit_progress
             )
             
-            if not self.is_running:
-                self.task_completed.emit(self.task.name, False, "Task cancelled")
+            if self.cancelled:
                 return
                 
             if success:
-                self.task_completed.emit(self.task.name, True, "Processing completed successfully")
+                self.signals.task_completed.emit(self.task.name, True, "Processing completed successfully")
             else:
-                self.task_completed.emit(self.task.name, False, "Processing failed")
+                self.signals.task_completed.emit(self.task.name, False, "Processing failed")
                 
         except Exception as e:
-            self.task_completed.emit(self.task.name, False, f"Error: {str(e)}")
-        finally:
-            self.is_running = False
+            if not self.cancelled:
+                self.signals.task_completed.emit(self.task.name, False, f"Error: {str(e)}")
             
-    def stop(self):
-        """Stop the processing."""
-        self.is_running = False
+    def _emit_progress(self, value):
+        """Emit progress only when the integer percentage changes."""
+        value = int(value)
+        if value != self._last_progress and not self.cancelled:
+            self._last_progress = value
+            self.signals.progress_updated.emit(self.task.name, value)
+            
+    def cancel(self):
+        """Cancel the task; a running task finishes but reports only finished."""
+        self.cancelled = True
 
 class MainWindow(QMainWindow):
     """Main application window."""
     
-    def __init__(self):
+    def __init__(self, max_workers: Optional[int] = None):
         super().__init__()
         self.setWindowTitle("Lecture Audio Cleaner")
         self.setMinimumSize(800, 600)
         
-        # Initialize audio processor
-        self.processor = AudioProcessor()
+        # Audio processor is created on first use (see _get_processor)
+        self.processor = None
+        
+        # Bound the number of tasks processed at once; extra tasks queue in the pool
+        self.thread_pool = QThreadPool.globalInstance()
+        if max_workers is None:
+            max_workers = min(4, os.cpu_count() or 1)
+        self.thread_pool.setMaxThreadCount(max_workers)
         
         # Create main widget and layout
         main_widget = QWidget()
@@ -105,9 +132,20 @@ class MainWindow(QMainWindow):
         self.start_all_button.clicked.connect(self.start_all_tasks)
         self.stop_all_button.clicked.connect(self.stop_all_tasks)
         
-        # Initialize task list and processing threads
-        self.tasks = {}  # Dictionary of task_name -> (task, task_item)
-        self.processing_threads = {}  # Dictionary of task_name -> processing_thread
+        # Initialize task list (parallel lists)
+        self.task_names = []  # Task names in display order
+        self.task_objs = []  # AudioTask for each name
+        self.task_items = []  # TaskItem for each name
+        self.task_runnables = []  # ProcessingRunnable for each name, None when idle
+        self._removed_runnables = {}  # task_name -> runnable still running for a removed task
+        self._idx = {}  # Dictionary of task_name -> index into the task lists
+        
+    def _get_processor(self):
+        """Get the audio processor, importing the audio stack on first use."""
+        if self.processor is None:
+            from audio.processor import AudioProcessor
+            self.processor = AudioProcessor()
+        return self.processor
         
     def add_task(self):
         """Add a new audio processing task."""
@@ -133,83 +171,119 @@ class MainWindow(QMainWindow):
                 task_item.start_clicked.connect(lambda: self.start_task(task.name))
                 task_item.delete_clicked.connect(lambda: self.remove_task(task.name))
                 
-                # Add to layouts
-                self.tasks[task.name] = (task, task_item)
+                # Add to task lists and layouts
+                if task.name in self._idx:
+                    index = self._idx[task.name]
+                    self.task_objs[index] = task
+                    self.task_items[index] = task_item
+                else:
+                    self._idx[task.name] = len(self.task_names)
+                    self.task_names.append(task.name)
+                    self.task_objs.append(task)
+                    self.task_items.append(task_item)
+                    self.task_runnables.append(None)
                 self.task_layout.insertWidget(self.task_layout.count() - 1, task_item)
                 
     def remove_task(self, task_name: str):
         """Remove a specific task."""
-        if task_name in self.tasks:
+        if task_name in self._idx:
             # Stop processing if running
             self.stop_task(task_name)
             
-            # Remove task
-            task, task_item = self.tasks.pop(task_name)
+            # Remove task and shift the indices of the ones after it
+            index = self._idx.pop(task_name)
+            self.task_names.pop(index)
+            self.task_objs.pop(index)
+            task_item = self.task_items.pop(index)
+            runnable = self.task_runnables.pop(index)
+            if runnable is not None:
+                # Keep it until it returns so a re-added task can't start alongside it
+                self._removed_runnables[task_name] = runnable
+            for name in self.task_names[index:]:
+                self._idx[name] -= 1
             task_item.deleteLater()
             
     def start_task(self, task_name: str):
         """Start processing a specific task."""
-        if task_name in self.tasks and task_name not in self.processing_threads:
-            task, task_item = self.tasks[task_name]
+        if task_name in self._idx:
+            index = self._idx[task_name]
+            # Still running, possibly cancelled but not yet returned; starting
+            # now would process the same output twice
+            if self.task_runnables[index] is not None or task_name in self._removed_runnables:
+                return
+            task, task_item = self.task_objs[index], self.task_items[index]
             
-            # Create and start processing thread
-            thread = ProcessingThread(self.processor, task)
-            thread.progress_updated.connect(self.update_task_progress)
-            thread.task_completed.connect(self.on_task_completed)
+            # Queue the task on the thread pool
+            runnable = ProcessingRunnable(self._get_processor(), task)
+            runnable.signals.progress_updated.connect(self.update_task_progress, Qt.QueuedConnection)
+            runnable.signals.task_completed.connect(self.on_task_completed)
+            runnable.signals.finished.connect(self.on_task_finished)
             
-            self.processing_threads[task_name] = thread
-            thread.start()
+            self.task_runnables[index] = runnable
+            self.thread_pool.start(runnable)
             
             # Update UI
             task_item.set_running(True)
             
     def stop_task(self, task_name: str):
         """Stop processing a specific task."""
-        if task_name in self.processing_threads:
-            thread = self.processing_threads.pop(task_name)
-            thread.stop()
-            thread.wait()
+        if task_name in self._idx:
+            index = self._idx[task_name]
+            runnable = self.task_runnables[index]
+            if runnable is None or runnable.cancelled:
+                return
+            # The slot is cleared in on_task_finished once run() returns
+            runnable.cancel()
             
             # Update UI
-            _, task_item = self.tasks[task_name]
-            task_item.set_running(False)
+            self.task_items[index].set_running(False)
             
     def start_all_tasks(self):
         """Start processing all tasks."""
-        if not self.tasks:
+        if not self.task_names:
             QMessageBox.warning(self, "Warning", "No tasks to process!")
             return
             
-        for task_name in self.tasks:
-            if task_name not in self.processing_threads:
-                self.start_task(task_name)
+        # The pool limits how many of these run at once
+        for task_name in self.task_names:
+            self.start_task(task_name)
                 
     def stop_all_tasks(self):
         """Stop processing all tasks."""
-        for task_name in list(self.processing_threads.keys()):
+        for task_name in self.task_names:
             self.stop_task(task_name)
             
     def update_task_progress(self, task_name: str, progress: int):
         """Update progress for a specific task."""
-        if task_name in self.tasks:
-            _, task_item = self.tasks[task_name]
-            task_item.set_progress(progress)
+        if task_name in self._idx:
+            self.task_items[self._idx[task_name]].set_progress(progress)
             
     def on_task_completed(self, task_name: str, success: bool, message: str):
         """Handle task completion."""
-        if task_name in self.processing_threads:
-            self.stop_task(task_name)
+        if task_name in self._idx:
+            index = self._idx[task_name]
+            runnable = self.task_runnables[index]
+            if runnable is None or runnable.cancelled:
+                return
             
             # Update task item status
-            if task_name in self.tasks:
-                _, task_item = self.tasks[task_name]
-                task_item.set_status(success, message)
+            self.task_items[index].set_running(False)
+            self.task_items[index].set_status(success, message)
                 
             # Show notification for failed tasks
             if not success:
                 QMessageBox.warning(self, "Task Failed", f"Task '{task_name}' failed: {message}")
             
+    def on_task_finished(self, task_name: str):
+        """Free the task's slot once its runnable has returned."""
+        if self._removed_runnables.pop(task_name, None) is not None:
+            return
+        if task_name in self._idx:
+            self.task_runnables[self._idx[task_name]] = None
+            
     def closeEvent(self, event):
         """Handle window close event."""
         self.stop_all_tasks()
+        # Let tasks that are already running finish before tearing down
+        self.thread_pool.waitForDone()
         super().closeEvent(event) 
\ No newline at end of file
@@ -12,6 +12,11 @@ from audio.task import (
     BackgroundNoiseLevel
 )
 
+# Combo box entries, built once at import rather than per dialog
+_NOISE_LEVELS = [level.value for level in NoiseReductionLevel]
+_ENHANCEMENT_LEVELS = [level.value for level in SpeechEnhancementLevel]
+_BACKGROUND_NOISE_LEVELS = [level.value for level in BackgroundNoiseLevel]
+
 class TaskDialog(QDialog):
     """Dialog for configuring audio processing tasks."""
     
@@ -41,7 +46,7 @@ class TaskDialog(QDialog):
         noise_level_layout = QHBoxLayout()
         noise_label = QLabel("Reduction Level:")
         self.noise_combo = QComboBox()
-        self.noise_combo.addItems([level.value for level in NoiseReductionLevel])
+        self.noise_combo.addItems(_NOISE_LEVELS)
         self.noise_combo.setCurrentText(NoiseReductionLevel.MEDIUM.value)
         noise_level_layout.addWidget(noise_label)
         noise_level_layout.addWidget(self.noise_combo)
@@ -63,7 +68,7 @@ class TaskDialog(QDialog):
         enhancement_layout = QHBoxLayout()
         enhancement_label = QLabel("Enhancement Level:")
         self.enhancement_combo = QComboBox()
-        self.enhancement_combo.addItems([level.value for level in SpeechEnhancementLevel])
+        self.enhancement_combo.addItems(_ENHANCEMENT_LEVELS)
         self.enhancement_combo.setCurrentText(SpeechEnhancementLevel.MEDIUM.value)
         enhancement_layout.addWidget(enhancement_label)
         enhancement_layout.addWidget(self.enhancement_combo)
@@ -78,7 +83,7 @@ class TaskDialog(QDialog):
         noise_suppression_layout = QHBoxLayout()
         noise_suppression_label = QLabel("Background Noise:")
         self.noise_suppression_combo = QComboBox()
-        self.noise_suppression_combo.addItems([level.value for level in BackgroundNoiseLevel])
+        self.noise_suppression_combo.addItems(_BACKGROUND_NOISE_LEVELS)
         self.noise_suppression_combo.setCurrentText(BackgroundNoiseLevel.MODERATE.value)
         noise_suppression_layout.addWidget(noise_suppression_label)
         noise_suppression_layout.addWidget(self.noise_suppression_combo)
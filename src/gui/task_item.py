@@ -3,10 +3,10 @@ Task item widget implementation.
 """
 from PyQt5.QtWidgets import (
     QWidget, QHBoxLayout, QLabel, QProgressBar,
-    QPushButton, QVBoxLayout, QStyle
+    QPushButton, QVBoxLayout, QStyle, QGraphicsDropShadowEffect
 )
-from PyQt5.QtCore import Qt, pyqtSignal, QRectF
-from PyQt5.QtGui import QIcon, QPainter, QColor, QPen, QPainterPath
+from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtGui import QIcon, QColor
 
 class TaskItem(QWidget):
     """Widget for displaying a single task in the task list."""
@@ -15,6 +15,26 @@ class TaskItem(QWidget):
     start_clicked = pyqtSignal()
     delete_clicked = pyqtSignal()
     
+    # Status label styles, swapped wholesale instead of re-polishing on a property
+    _SUCCESS_CSS = """
+        QLabel {
+            font-size: 12px;
+            padding: 2px 6px;
+            border-radius: 4px;
+            background: #e6f4ea;
+            color: #1e7e34;
+        }
+    """
+    _ERROR_CSS = """
+        QLabel {
+            font-size: 12px;
+            padding: 2px 6px;
+            border-radius: 4px;
+            background: #fce8e8;
+            color: #dc3545;
+        }
+    """
+    
     def __init__(self, task_name: str, parent=None):
         super().__init__(parent)
         self.is_running = False
@@ -39,21 +59,6 @@ class TaskItem(QWidget):
         
         # Status label
         self.status_label = QLabel()
-        self.status_label.setStyleSheet("""
-            QLabel {
-                font-size: 12px;
-                padding: 2px 6px;
-                border-radius: 4px;
-            }
-            QLabel[status="success"] {
-                background: #e6f4ea;
-                color: #1e7e34;
-            }
-            QLabel[status="error"] {
-                background: #fce8e8;
-                color: #dc3545;
-            }
-        """)
         self.status_label.hide()
         top_layout.addWidget(self.status_label)
         
@@ -117,26 +122,12 @@ class TaskItem(QWidget):
             }
         """)
         
-    def paintEvent(self, event):
-        """Custom paint event to draw shadow and border."""
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-        
-        rect = QRectF(self.rect())
-        
-        # Draw shadow
-        shadow_path = QPainterPath()
-        shadow_path.addRoundedRect(rect.adjusted(2, 2, -2, -2), 6, 6)
-        painter.setPen(Qt.NoPen)
-        painter.setBrush(QColor(0, 0, 0, 15))
-        painter.drawPath(shadow_path.translated(0, 1))
-        
-        # Draw border
-        border_path = QPainterPath()
-        border_path.addRoundedRect(rect.adjusted(0.5, 0.5, -0.5, -0.5), 6, 6)
-        painter.setPen(QPen(self.palette().mid(), 1))
-        painter.setBrush(self.palette().base())
-        painter.drawPath(border_path)
+        # Drop shadow; the rounded border comes from the stylesheet above
+        shadow = QGraphicsDropShadowEffect(self)
+        shadow.setBlurRadius(6)
+        shadow.setOffset(0, 1)
+        shadow.setColor(QColor(0, 0, 0, 40))
+        self.setGraphicsEffect(shadow)
         
     def set_progress(self, value: int):
         """Set the progress bar value."""
@@ -160,10 +151,8 @@ class TaskItem(QWidget):
         
     def set_status(self, success: bool, message: str):
         """Update the status display."""
+        self.status_label.setStyleSheet(self._SUCCESS_CSS if success else self._ERROR_CSS)
         self.status_label.setText(message)
-        self.status_label.setProperty("status", "success" if success else "error")
-        self.status_label.style().unpolish(self.status_label)
-        self.status_label.style().polish(self.status_label)
         self.status_label.show()
         
     def _on_start_clicked(self):
@@ -2,14 +2,43 @@
 """
 Main entry point for the Lecture Audio Cleaner application.
 """
+import argparse
 import sys
-from PyQt5.QtWidgets import QApplication
-from gui.main_window import MainWindow
+
+def _positive_int(value: str) -> int:
+    """Parse a command-line integer that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
 
 def main():
     """Initialize and run the application."""
-    app = QApplication(sys.argv)
-    window = MainWindow()
+    parser = argparse.ArgumentParser(description="Clean up lecture audio recordings.")
+    parser.add_argument(
+        "--max-workers",
+        type=_positive_int,
+        default=None,
+        help="maximum number of tasks processed at once (default: up to 4)"
+    )
+    args, qt_args = parser.parse_known_args()
+    
+    # Qt and the GUI are imported here so argument errors and --help return
+    # without loading them
+    from PyQt5.QtCore import Qt, QCoreApplication
+    from PyQt5.QtWidgets import QApplication
+    from gui.main_window import MainWindow
+    
+    # Application attributes only take effect before QApplication is created
+    QCoreApplication.setAttribute(Qt.AA_EnableHighDpiScaling)
+    QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
+    
+    # Only arguments argparse didn't consume are left for Qt to parse
+    app = QApplication(sys.argv[:1] + qt_args)
+    window = MainWindow(max_workers=args.max_workers)
     window.show()
     sys.exit(app.exec_())
 
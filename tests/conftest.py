@@ -0,0 +1,54 @@
+"""
+Shared fixtures for the test suite.
+"""
+import os
+import pytest
+from pydub import AudioSegment
+from src.audio import processor as processor_module
+from src.audio.processor import AudioProcessor
+
+# Test file paths
+TEST_FILE = os.path.join(os.path.dirname(__file__), "test.mp3")
+
+def pytest_addoption(parser):
+    """Add the --run-slow option."""
+    parser.addoption(
+        "--run-slow",
+        action="store_true",
+        default=False,
+        help="run tests marked slow (full output decodes)"
+    )
+
+def pytest_configure(config):
+    """Register custom markers."""
+    config.addinivalue_line("markers", "slow: full-decode checks, run with --run-slow")
+
+def pytest_collection_modifyitems(config, items):
+    """Skip slow tests unless --run-slow is given."""
+    if config.getoption("--run-slow"):
+        return
+    skip_slow = pytest.mark.skip(reason="needs --run-slow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
+
+@pytest.fixture(autouse=True)
+def noise_profile_cache(tmp_path, monkeypatch):
+    """Keep cached noise profiles out of the user's cache directory."""
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(processor_module, "NOISE_PROFILE_CACHE_DIR", cache_dir)
+    return cache_dir
+
+@pytest.fixture(scope="session")
+def processor():
+    """Audio processor shared by all tests."""
+    return AudioProcessor()
+
+@pytest.fixture(scope="session")
+def decoded_wav(tmp_path_factory):
+    """Decode TEST_FILE once into a WAV file shared by all tests."""
+    if not os.path.exists(TEST_FILE):
+        pytest.skip(f"sample recording {TEST_FILE} not found")
+    path = tmp_path_factory.mktemp("decoded") / "test.wav"
+    AudioSegment.from_mp3(TEST_FILE).export(str(path), format="wav")
+    return str(path)
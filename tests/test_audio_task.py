@@ -0,0 +1,33 @@
+"""
+Tests for the audio task module.
+"""
+import os
+import pytest
+from src.audio.task import AudioTask
+
+def test_defaults_from_input_path():
+    """Test that name, format and output path are derived from the input."""
+    task = AudioTask(input_path=os.path.join("lectures", "week1.MP3"))
+    assert task.name == "week1", "Name not taken from the file stem"
+    assert task.output_format == "mp3", "Output format not taken from the extension"
+    assert task.output_path == os.path.join("lectures", "week1_cleaned.MP3"), "Unexpected output path"
+
+def test_explicit_values_are_kept():
+    """Test that an explicit name and output path are not overwritten."""
+    task = AudioTask(input_path="week1.wav", name="Week 1", output_path="out.wav")
+    assert task.name == "Week 1", "Explicit name was replaced"
+    assert task.output_path == "out.wav", "Explicit output path was replaced"
+
+@pytest.mark.parametrize("output_format", ["mp3", "flac"])
+def test_output_format_sets_suffix(output_format):
+    """Test that an explicit output format changes the output suffix."""
+    task = AudioTask(input_path="week1.wav", output_format=output_format)
+    assert task.output_format == output_format, "Explicit output format was replaced"
+    assert task.output_path == f"week1_cleaned.{output_format}", "Suffix does not match the output format"
+
+@pytest.mark.parametrize("input_path", ["week1.wma", "week1"], ids=["unsupported", "no-extension"])
+def test_unsupported_input_defaults_to_wav(input_path):
+    """Test that inputs with an unsupported extension are written as WAV."""
+    task = AudioTask(input_path=input_path)
+    assert task.output_format == "wav", "Unsupported input did not default to WAV"
+    assert task.output_path == "week1_cleaned.wav", "Unsupported input did not get a .wav suffix"
@@ -0,0 +1,80 @@
+"""
+Tests for the spectral gating module.
+"""
+import subprocess
+import sys
+import pytest
+import numpy as np
+from pathlib import Path
+from src.audio.spectral import noise_profile, spectral_gate, stft_params
+
+SR = 16000
+N_FFT, HOP_LENGTH = stft_params(SR)
+
+def _noise(seconds, seed):
+    """White noise well below full scale."""
+    rng = np.random.default_rng(seed)
+    return 0.01 * rng.standard_normal(int(seconds * SR)).astype(np.float32)
+
+@pytest.fixture(scope="module")
+def profile():
+    """Noise profile estimated from a separate noise clip."""
+    return noise_profile(_noise(1, seed=0), SR, N_FFT, HOP_LENGTH)
+
+def _gate(y, profile, prop_decrease):
+    """Run the CPU gate with the module's STFT parameters."""
+    noise_mean, noise_std = profile
+    return spectral_gate(
+        y, SR, noise_mean, noise_std,
+        prop_decrease=prop_decrease,
+        n_fft=N_FFT,
+        hop_length=HOP_LENGTH
+    )
+
+@pytest.mark.parametrize("length", [100, N_FFT, 12345], ids=["short", "one-frame", "long"])
+def test_output_shape(length, profile):
+    """Test that the output keeps the input's length and dtype."""
+    y = _noise(length / SR, seed=1)
+    y_out = _gate(y, profile, 0.7)
+    assert len(y_out) == len(y), "Output length differs from input"
+    assert y_out.dtype == np.float32, "Output is not float32"
+
+@pytest.mark.parametrize("prop_decrease", [0.5, 0.7, 0.9])
+def test_noise_is_attenuated(prop_decrease, profile):
+    """Test that noise-only input is attenuated by about prop_decrease."""
+    y = _noise(2, seed=1)
+    y_out = _gate(y, profile, prop_decrease)
+    ratio = np.sqrt(np.mean(y_out ** 2) / np.mean(y ** 2))
+    assert ratio == pytest.approx(1 - prop_decrease, abs=0.1), "Noise not attenuated by prop_decrease"
+
+def test_loud_tone_passes(profile):
+    """Test that a tone far above the noise threshold passes unchanged."""
+    t = np.arange(2 * SR, dtype=np.float32) / SR
+    y = 0.5 * np.sin(2 * np.pi * 1000 * t)
+    y_out = _gate(y, profile, 0.9)
+    # The first and last frame see the zero padding, so compare the interior
+    np.testing.assert_allclose(y_out[N_FFT:-N_FFT], y[N_FFT:-N_FFT], atol=1e-3)
+
+# Runs the gate once in a fresh interpreter, importing spectral under the given name
+_GATE_SCRIPT = """
+import importlib, sys
+import numpy as np
+spectral = importlib.import_module(sys.argv[1])
+y = np.zeros(4096, dtype=np.float32)
+noise_mean, noise_std = spectral.noise_profile(y, 16000)
+spectral.spectral_gate(y, 16000, noise_mean, noise_std, prop_decrease=0.7)
+"""
+
+def test_gate_under_both_import_names():
+    """Test the gate as imported by the app (audio.*) and by the tests (src.audio.*).
+    
+    A compile cache written under one module name must not break the other.
+    """
+    root = Path(__file__).resolve().parent.parent
+    for module, cwd in [("audio.spectral", root / "src"), ("src.audio.spectral", root),
+                        ("audio.spectral", root / "src")]:
+        result = subprocess.run(
+            [sys.executable, "-c", _GATE_SCRIPT, module],
+            cwd=cwd, capture_output=True, text=True
+        )
+        assert result.returncode == 0, f"Gate failed when imported as {module}:\n{result.stderr}"